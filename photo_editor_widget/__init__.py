@@ -4,16 +4,37 @@ Photo Editor Widget Plugin
 プラグインエントリーポイント
 """
 
+# QGIS側で読み込み済みのモジュールを先に参照し、sys.modules を温めておく
+# （PhotoEditorPlugin 自体は classFactory まで遅延させる）
+from qgis.gui import QgsGui, QgsEditorWidgetFactory, QgsEditorConfigWidget  # noqa: F401
+
+# 解決済みの PhotoEditorPlugin クラス（初回アクセス時にキャッシュ）
+_PLUGIN_CLS = None
+
+
+def __getattr__(name):
+    """
+    モジュール属性の遅延解決（PEP 562）
+
+    PhotoEditorPlugin は初回アクセス時にのみインポートし、以降はキャッシュを返す
+    """
+    global _PLUGIN_CLS
+    if name == "PhotoEditorPlugin":
+        if _PLUGIN_CLS is None:
+            from .photo_editor_plugin import PhotoEditorPlugin
+            _PLUGIN_CLS = PhotoEditorPlugin
+        return _PLUGIN_CLS
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def classFactory(iface):
     """
     QGISがプラグインを読み込む際に呼ばれる関数
-    
+
     Args:
         iface: QGISインターフェース
-        
+
     Returns:
         PhotoEditorPlugin: プラグインインスタンス
     """
-    from .photo_editor_plugin import PhotoEditorPlugin
-    return PhotoEditorPlugin(iface)
+    return __getattr__("PhotoEditorPlugin")(iface)
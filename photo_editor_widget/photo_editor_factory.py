@@ -5,55 +5,62 @@ Photo Editor Widget Factory
 QGISエディタウィジェットのファクトリクラス
 """
 
+from functools import lru_cache
+from importlib import import_module
 from qgis.gui import QgsEditorWidgetFactory, QgsEditorConfigWidget
-from qgis.PyQt.QtWidgets import QWidget
+
+
+# 空の設定（QGIS側でQVariantMapにコピーされるため共有して問題ない）
+_EMPTY_CONFIG = {}
+
+
+@lru_cache(maxsize=None)
+def _resolve(modname, attr):
+    """
+    遅延インポートしたクラスを解決（モジュール・属性ごとに1回だけ）
+    
+    Args:
+        modname: モジュール名（パッケージ相対）
+        attr: 属性名
+        
+    Returns:
+        解決したクラス
+    """
+    return getattr(import_module(modname, __package__), attr)
 
 
 class PhotoEditorConfigWidget(QgsEditorConfigWidget):
     """設定ウィジェット（空実装）"""
     
-    def __init__(self, vl, fieldIdx, parent):
-        super().__init__(vl, fieldIdx, parent)
-    
     def config(self):
         """設定を返す"""
-        return {}
+        return _EMPTY_CONFIG
     
     def setConfig(self, config):
         """設定を受け取る"""
         pass
 
 
-class PhotoEditorWidgetFactory(QgsEditorWidgetFactory):
-    """
-    写真編集ウィジェットファクトリ
+class PhotoWidgetFactory(QgsEditorWidgetFactory):
     """
+    写真ウィジェットファクトリ
     
-    def __init__(self, name):
-        super().__init__(name)
-    
-    def create(self, vl, fieldIdx, editor, parent):
-        """ウィジェットインスタンスを作成"""
-        from .photo_editor_widget import PhotoEditorWidget
-        return PhotoEditorWidget(vl, fieldIdx, editor, parent)
-    
-    def configWidget(self, vl, fieldIdx, parent):
-        """設定ウィジェットを返す"""
-        return PhotoEditorConfigWidget(vl, fieldIdx, parent)
-
-
-class PhotoViewerWidgetFactory(QgsEditorWidgetFactory):
-    """
-    写真表示専用ウィジェットファクトリ（編集不可）
+    編集用・表示専用で共通のファクトリ。生成するウィジェットクラスは
+    モジュール名とクラス名で指定し、初回の create() で遅延解決する
     """
     
-    def __init__(self, name):
+    def __init__(self, name, widget_module, widget_class):
         super().__init__(name)
+        self._widget_module = widget_module
+        self._widget_class = widget_class
+    
+    def widget_class(self):
+        """生成するウィジェットクラスを返す"""
+        return _resolve(self._widget_module, self._widget_class)
     
     def create(self, vl, fieldIdx, editor, parent):
         """ウィジェットインスタンスを作成"""
-        from .photo_viewer_widget import PhotoViewerWidget
-        return PhotoViewerWidget(vl, fieldIdx, editor, parent)
+        return self.widget_class()(vl, fieldIdx, editor, parent)
     
     def configWidget(self, vl, fieldIdx, parent):
         """設定ウィジェットを返す"""
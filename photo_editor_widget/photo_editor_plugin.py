@@ -5,8 +5,30 @@ Photo Editor Widget Plugin
 設備点検用写真編集プラグイン
 """
 
+import sys
 from qgis.gui import QgsGui
 from qgis.core import QgsMessageLog, Qgis
+from qgis.PyQt.QtCore import QTimer
+from qgis.PyQt.QtGui import QPixmapCache
+
+
+# ログ出力用のローカル束縛
+_log = QgsMessageLog.logMessage
+_INFO = Qgis.Info
+_WARNING = Qgis.Warning
+_CRITICAL = Qgis.Critical
+
+# エディタウィジェットの登録キー
+_EDITOR_KEY = sys.intern("Photo Editor")
+_VIEWER_KEY = sys.intern("Photo Viewer")
+
+# QPixmapCache の上限（KB）
+PIXMAP_CACHE_LIMIT_KB = 64 * 1024
+
+_INIT_OK_MSG = "✓ Photo Editor / Photo Viewer ウィジェットを登録しました"
+_INIT_ERR_FMT = "❌ プラグイン初期化エラー: {}"
+_REJECTED_FMT = "⚠ {} は登録済みのため登録されませんでした（既存の登録が使われます）"
+_UNLOAD_MSG = "✓ Photo Editor プラグインを終了しました"
 
 
 class PhotoEditorPlugin:
@@ -18,46 +40,71 @@ class PhotoEditorPlugin:
         self.iface = iface
         self.editor_factory = None
         self.viewer_factory = None
+        self._register_timer = None  # 登録待ちのタイマー（unload で停止する）
     
     def initGui(self):
         """プラグイン起動時の初期化"""
+        # 登録済み・登録待ち（再読み込み時など）なら何もしない
+        if self.editor_factory is not None or self._register_timer is not None:
+            return
+        
+        # ウィジェット登録はイベントループに戻ってから行い、起動をブロックしない
+        self._register_timer = QTimer()
+        self._register_timer.setSingleShot(True)
+        self._register_timer.timeout.connect(self._do_register)
+        self._register_timer.start(0)
+    
+    def _do_register(self):
+        """エディタウィジェットファクトリを登録"""
+        # 登録前に unload された場合は何もしない
+        if self._register_timer is None:
+            return
+        self._register_timer = None
+        
         try:
-            from .photo_editor_factory import PhotoEditorWidgetFactory, PhotoViewerWidgetFactory
+            from .photo_editor_factory import PhotoWidgetFactory
+            
+            # 写真の表示用ピクセルマップを保持できるようキャッシュ上限を引き上げる
+            if QPixmapCache.cacheLimit() < PIXMAP_CACHE_LIMIT_KB:
+                QPixmapCache.setCacheLimit(PIXMAP_CACHE_LIMIT_KB)
             
-            registry = QgsGui.editorWidgetRegistry()
+            register = QgsGui.editorWidgetRegistry().registerWidget
             
             # Photo Editor（編集用）を登録
-            self.editor_factory = PhotoEditorWidgetFactory("Photo Editor")
-            registry.registerWidget("Photo Editor", self.editor_factory)
+            self.editor_factory = PhotoWidgetFactory(
+                _EDITOR_KEY, ".photo_editor_widget", "PhotoEditorWidget"
+            )
+            editor_ok = register(_EDITOR_KEY, self.editor_factory)
             
             # Photo Viewer（表示専用）を登録
-            self.viewer_factory = PhotoViewerWidgetFactory("Photo Viewer")
-            registry.registerWidget("Photo Viewer", self.viewer_factory)
-            
-            QgsMessageLog.logMessage(
-                "✓ Photo Editor / Photo Viewer ウィジェットを登録しました",
-                "PhotoEditor",
-                Qgis.Info
+            self.viewer_factory = PhotoWidgetFactory(
+                _VIEWER_KEY, ".photo_viewer_widget", "PhotoViewerWidget"
             )
+            viewer_ok = register(_VIEWER_KEY, self.viewer_factory)
+            
+            # ウィジェットモジュールを先読みし、初回のフォーム表示で待たせない
+            self.editor_factory.widget_class()
+            self.viewer_factory.widget_class()
+            
+            # 同じIDが登録済みの場合、レジストリは False を返し既存の登録を残す
+            if not editor_ok:
+                _log(_REJECTED_FMT.format(_EDITOR_KEY), "PhotoEditor", _WARNING)
+            if not viewer_ok:
+                _log(_REJECTED_FMT.format(_VIEWER_KEY), "PhotoEditor", _WARNING)
+            if editor_ok and viewer_ok:
+                _log(_INIT_OK_MSG, "PhotoEditor", _INFO)
             
         except Exception as e:
-            QgsMessageLog.logMessage(
-                f"❌ プラグイン初期化エラー: {str(e)}",
-                "PhotoEditor",
-                Qgis.Critical
-            )
+            _log(_INIT_ERR_FMT.format(e), "PhotoEditor", _CRITICAL)
     
     def unload(self):
         """プラグイン終了時のクリーンアップ"""
-        try:
-            QgsMessageLog.logMessage(
-                "✓ Photo Editor プラグインを終了しました",
-                "PhotoEditor",
-                Qgis.Info
-            )
-        except Exception as e:
-            QgsMessageLog.logMessage(
-                f"❌ プラグイン終了エラー: {str(e)}",
-                "PhotoEditor",
-                Qgis.Critical
-            )
+        # QgsEditorWidgetRegistry には登録解除APIがなく、ファクトリの所有権は
+        # レジストリに移っているため、こちらの参照だけを解放する
+        if self._register_timer is not None:
+            # 登録前に終了した場合は、保留中の登録を取り消す
+            self._register_timer.stop()
+            self._register_timer = None
+        self.editor_factory = None
+        self.viewer_factory = None
+        _log(_UNLOAD_MSG, "PhotoEditor", _INFO)
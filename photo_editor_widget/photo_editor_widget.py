@@ -6,6 +6,7 @@ QGISカスタムウィジェットとして写真の表示・編集を行う
 QGraphicsViewベースの実装
 """
 
+import math
 import os
 from datetime import datetime
 from pathlib import Path
@@ -19,13 +20,37 @@ from qgis.PyQt.QtWidgets import (
     QFrame, QSizePolicy
 )
 from qgis.PyQt.QtGui import (
-    QPixmap, QImage, QPainter, QColor, QPen, QBrush,
+    QImage, QPainter, QColor, QPen, QBrush,
     QPainterPath, QPolygonF, QFont
 )
-from qgis.PyQt.QtCore import Qt, QPointF, QRectF, QLineF, QTimer
-from qgis.core import QgsMessageLog, Qgis
+from qgis.PyQt.QtCore import (
+    Qt, QPointF, QRectF, QLineF, QTimer, QSize, QThreadPool
+)
+from qgis.core import QgsMessageLog, Qgis, edit
 
 from .utils.file_parser import PhotoFileNameParser
+from .utils.image_loader import PhotoLoader, pixmap_cache_key, find_pixmap, cache_pixmap
+from .utils.view_fit import fit_view_to_scene
+
+
+# 詳細ログ（Info）の出力有無。PHOTO_EDITOR_DEBUG=1 で有効
+DEBUG = os.environ.get("PHOTO_EDITOR_DEBUG") == "1"
+
+# 描画中のプレビュー更新間隔（ミリ秒、約60Hz）
+MOVE_THROTTLE_MS = 16
+
+# 矢印の先端の半幅（先端長に対する比率）
+ARROW_HEAD_HALF_WIDTH = 0.5
+
+# 画像読み込み後にフィットするまでの待ち時間（ミリ秒）
+FIT_DELAY_MS = 16
+
+# 図形の塗り（透明）と保存時の背景色
+TRANSPARENT_BRUSH = QBrush(Qt.transparent)
+WHITE = QColor(255, 255, 255)
+
+# 編集表示用に読み込む画像の最大サイズ（保存時は元画像の解像度で出力）
+MAX_DISPLAY_SIZE = QSize(1600, 1200)
 
 
 class DrawingTool:
@@ -51,11 +76,41 @@ class PhotoGraphicsView(QGraphicsView):
         self.start_point = None
         self.current_item = None
         self.pen_path = None
+        self._pen_pending = 0  # setPath未反映のペン描画点数
+        self._pending_point = None  # 未反映の図形プレビュー終点
+        
+        # 高レートのマウス移動をまとめてプレビューに反映するタイマー
+        self._move_timer = QTimer(self)
+        self._move_timer.setSingleShot(True)
+        self._move_timer.setInterval(MOVE_THROTTLE_MS)
+        self._move_timer.timeout.connect(self._apply_pending_move)
+        self._inv_transform = None  # ビューポート→シーン変換のキャッシュ
         
     def set_editor_widget(self, editor_widget):
         """親ウィジェットへの参照を設定"""
         self.editor_widget = editor_widget
     
+    def _map_to_scene(self, pos):
+        """ビュー座標をシーン座標に変換（逆変換行列をキャッシュ）"""
+        if self._inv_transform is None:
+            self._inv_transform = self.viewportTransform().inverted()[0]
+        return self._inv_transform.map(QPointF(pos))
+    
+    def fit_scene(self):
+        """シーン全体をビューにフィット"""
+        if fit_view_to_scene(self):
+            self._inv_transform = None
+    
+    def scrollContentsBy(self, dx, dy):
+        """スクロール"""
+        self._inv_transform = None
+        super().scrollContentsBy(dx, dy)
+    
+    def resizeEvent(self, event):
+        """リサイズ"""
+        self._inv_transform = None
+        super().resizeEvent(event)
+    
     def mousePressEvent(self, event):
         """マウス押下"""
         if not self.editor_widget:
@@ -70,10 +125,14 @@ class PhotoGraphicsView(QGraphicsView):
         
         if event.button() == Qt.LeftButton:
             self.drawing = True
-            self.start_point = self.mapToScene(event.pos())
+            # ドラッグ開始時点の変換で取り直す
+            self._inv_transform = None
+            self.start_point = self._map_to_scene(event.pos())
             
             if tool == DrawingTool.PEN:
                 self._start_pen_drawing()
+            elif tool in [DrawingTool.LINE, DrawingTool.ARROW, DrawingTool.RECT, DrawingTool.ELLIPSE]:
+                self._start_shape_preview()
             elif tool == DrawingTool.TEXT:
                 self._add_text()
                 self.drawing = False
@@ -91,12 +150,25 @@ class PhotoGraphicsView(QGraphicsView):
             return
         
         if self.drawing and self.start_point:
-            current_point = self.mapToScene(event.pos())
+            current_point = self._map_to_scene(event.pos())
             
             if tool == DrawingTool.PEN:
                 self._continue_pen_drawing(current_point)
             elif tool in [DrawingTool.LINE, DrawingTool.ARROW, DrawingTool.RECT, DrawingTool.ELLIPSE]:
-                self._update_shape_preview(current_point)
+                self._pending_point = current_point
+            
+            # シーンへの反映はタイマーでまとめて行う
+            if not self._move_timer.isActive():
+                self._move_timer.start()
+    
+    def _apply_pending_move(self):
+        """まとめたマウス移動をプレビューに反映"""
+        if not self.drawing:
+            return
+        if self._pending_point is not None:
+            self._update_shape_preview(self._pending_point)
+            self._pending_point = None
+        self._flush_pen_path()
     
     def mouseReleaseEvent(self, event):
         """マウスリリース"""
@@ -111,7 +183,9 @@ class PhotoGraphicsView(QGraphicsView):
             return
         
         if self.drawing and event.button() == Qt.LeftButton:
-            end_point = self.mapToScene(event.pos())
+            end_point = self._map_to_scene(event.pos())
+            self._move_timer.stop()
+            self._pending_point = None
             
             if tool == DrawingTool.PEN:
                 self._finish_pen_drawing()
@@ -130,65 +204,65 @@ class PhotoGraphicsView(QGraphicsView):
     
     def _get_pen(self):
         """現在の描画ペンを取得"""
-        pen = QPen(self.editor_widget.current_color)
-        pen.setWidth(self.editor_widget.line_width)
-        pen.setCapStyle(Qt.RoundCap)
-        pen.setJoinStyle(Qt.RoundJoin)
-        return pen
+        return self.editor_widget.get_pen()
     
     def _start_pen_drawing(self):
         """ペン描画開始"""
         self.pen_path = QPainterPath()
         self.pen_path.moveTo(self.start_point)
+        self._pen_pending = 0
         self.current_item = QGraphicsPathItem(self.pen_path)
         self.current_item.setPen(self._get_pen())
         self.scene().addItem(self.current_item)
     
     def _continue_pen_drawing(self, point):
         """ペン描画継続"""
-        if self.pen_path and self.current_item:
+        if self.pen_path is not None and self.current_item:
+            # 点はすべてパスに追加するが、setPathはパス全体をコピーするため
+            # アイテムへの反映は _apply_pending_move でまとめて行う
             self.pen_path.lineTo(point)
+            self._pen_pending += 1
+    
+    def _flush_pen_path(self):
+        """バッファ済みのペン描画をアイテムに反映"""
+        if self._pen_pending and self.current_item:
             self.current_item.setPath(self.pen_path)
+        self._pen_pending = 0
     
     def _finish_pen_drawing(self):
         """ペン描画終了"""
+        if self.pen_path is not None:
+            self._flush_pen_path()
         self.pen_path = None
     
-    def _update_shape_preview(self, current_point):
-        """図形プレビュー更新"""
-        if self.current_item:
-            self.scene().removeItem(self.current_item)
-        
+    def _start_shape_preview(self):
+        """図形プレビュー開始（プレビューアイテムを1度だけ作成）"""
         tool = self.editor_widget.current_tool
         pen = self._get_pen()
         
-        if tool == DrawingTool.LINE:
-            self.current_item = QGraphicsLineItem(
-                QLineF(self.start_point, current_point)
-            )
-            self.current_item.setPen(pen)
-        
-        elif tool == DrawingTool.ARROW:
+        if tool in [DrawingTool.LINE, DrawingTool.ARROW]:
             # 矢印は線として表示（プレビュー）
             self.current_item = QGraphicsLineItem(
-                QLineF(self.start_point, current_point)
+                QLineF(self.start_point, self.start_point)
             )
-            self.current_item.setPen(pen)
-        
         elif tool == DrawingTool.RECT:
-            rect = QRectF(self.start_point, current_point).normalized()
-            self.current_item = QGraphicsRectItem(rect)
-            self.current_item.setPen(pen)
-            self.current_item.setBrush(QBrush(Qt.transparent))
-        
+            self.current_item = QGraphicsRectItem(QRectF(self.start_point, self.start_point))
+            self.current_item.setBrush(TRANSPARENT_BRUSH)
         elif tool == DrawingTool.ELLIPSE:
-            rect = QRectF(self.start_point, current_point).normalized()
-            self.current_item = QGraphicsEllipseItem(rect)
-            self.current_item.setPen(pen)
-            self.current_item.setBrush(QBrush(Qt.transparent))
+            self.current_item = QGraphicsEllipseItem(QRectF(self.start_point, self.start_point))
+            self.current_item.setBrush(TRANSPARENT_BRUSH)
+        else:
+            return
         
-        if self.current_item:
-            self.scene().addItem(self.current_item)
+        self.current_item.setPen(pen)
+        self.scene().addItem(self.current_item)
+    
+    def _update_shape_preview(self, current_point):
+        """図形プレビュー更新（ジオメトリのみ変更）"""
+        if isinstance(self.current_item, QGraphicsLineItem):
+            self.current_item.setLine(QLineF(self.start_point, current_point))
+        elif isinstance(self.current_item, (QGraphicsRectItem, QGraphicsEllipseItem)):
+            self.current_item.setRect(QRectF(self.start_point, current_point).normalized())
     
     def _create_line(self, end_point):
         """直線作成"""
@@ -201,10 +275,11 @@ class PhotoGraphicsView(QGraphicsView):
         line.setFlag(QGraphicsLineItem.ItemIsMovable, True)
         self.scene().addItem(line)
         
-        QgsMessageLog.logMessage(
-            f"直線作成: ({self.start_point.x():.0f},{self.start_point.y():.0f}) → ({end_point.x():.0f},{end_point.y():.0f})",
-            "PhotoEditor", Qgis.Info
-        )
+        if DEBUG:
+            QgsMessageLog.logMessage(
+                f"直線作成: ({self.start_point.x():.0f},{self.start_point.y():.0f}) → ({end_point.x():.0f},{end_point.y():.0f})",
+                "PhotoEditor", Qgis.Info
+            )
     
     def _create_arrow(self, end_point):
         """矢印作成"""
@@ -226,23 +301,24 @@ class PhotoGraphicsView(QGraphicsView):
         # 方向ベクトル
         dx = end_point.x() - self.start_point.x()
         dy = end_point.y() - self.start_point.y()
-        length = (dx**2 + dy**2)**0.5
+        length = math.hypot(dx, dy)
         
         if length > 0:
-            # 正規化
-            dx /= length
-            dy /= length
+            # 単位ベクトル
+            ux = dx / length
+            uy = dy / length
+            
+            # 先端から arrow_size 戻った基点と、そこからの垂直方向オフセット
+            base_x = end_point.x() - arrow_size * ux
+            base_y = end_point.y() - arrow_size * uy
+            half = arrow_size * ARROW_HEAD_HALF_WIDTH
+            off_x = half * uy
+            off_y = -half * ux
             
             # 矢印の先端の三角形の点
             p1 = end_point
-            p2 = QPointF(
-                end_point.x() - arrow_size * dx + arrow_size * 0.5 * dy,
-                end_point.y() - arrow_size * dy - arrow_size * 0.5 * dx
-            )
-            p3 = QPointF(
-                end_point.x() - arrow_size * dx - arrow_size * 0.5 * dy,
-                end_point.y() - arrow_size * dy + arrow_size * 0.5 * dx
-            )
+            p2 = QPointF(base_x + off_x, base_y + off_y)
+            p3 = QPointF(base_x - off_x, base_y - off_y)
             
             arrow_head = QPolygonF([p1, p2, p3])
             arrow_item = QGraphicsPolygonItem(arrow_head)
@@ -252,10 +328,11 @@ class PhotoGraphicsView(QGraphicsView):
             arrow_item.setFlag(QGraphicsPolygonItem.ItemIsMovable, True)
             self.scene().addItem(arrow_item)
         
-        QgsMessageLog.logMessage(
-            f"矢印作成: ({self.start_point.x():.0f},{self.start_point.y():.0f}) → ({end_point.x():.0f},{end_point.y():.0f})",
-            "PhotoEditor", Qgis.Info
-        )
+        if DEBUG:
+            QgsMessageLog.logMessage(
+                f"矢印作成: ({self.start_point.x():.0f},{self.start_point.y():.0f}) → ({end_point.x():.0f},{end_point.y():.0f})",
+                "PhotoEditor", Qgis.Info
+            )
     
     def _create_rect(self, end_point):
         """四角形作成"""
@@ -265,15 +342,16 @@ class PhotoGraphicsView(QGraphicsView):
         rect = QRectF(self.start_point, end_point).normalized()
         rect_item = QGraphicsRectItem(rect)
         rect_item.setPen(self._get_pen())
-        rect_item.setBrush(QBrush(Qt.transparent))
+        rect_item.setBrush(TRANSPARENT_BRUSH)
         rect_item.setFlag(QGraphicsRectItem.ItemIsSelectable, True)
         rect_item.setFlag(QGraphicsRectItem.ItemIsMovable, True)
         self.scene().addItem(rect_item)
         
-        QgsMessageLog.logMessage(
-            f"四角形作成: {rect.width():.0f}x{rect.height():.0f}",
-            "PhotoEditor", Qgis.Info
-        )
+        if DEBUG:
+            QgsMessageLog.logMessage(
+                f"四角形作成: {rect.width():.0f}x{rect.height():.0f}",
+                "PhotoEditor", Qgis.Info
+            )
     
     def _create_ellipse(self, end_point):
         """楕円作成"""
@@ -283,15 +361,16 @@ class PhotoGraphicsView(QGraphicsView):
         rect = QRectF(self.start_point, end_point).normalized()
         ellipse_item = QGraphicsEllipseItem(rect)
         ellipse_item.setPen(self._get_pen())
-        ellipse_item.setBrush(QBrush(Qt.transparent))
+        ellipse_item.setBrush(TRANSPARENT_BRUSH)
         ellipse_item.setFlag(QGraphicsEllipseItem.ItemIsSelectable, True)
         ellipse_item.setFlag(QGraphicsEllipseItem.ItemIsMovable, True)
         self.scene().addItem(ellipse_item)
         
-        QgsMessageLog.logMessage(
-            f"楕円作成: {rect.width():.0f}x{rect.height():.0f}",
-            "PhotoEditor", Qgis.Info
-        )
+        if DEBUG:
+            QgsMessageLog.logMessage(
+                f"楕円作成: {rect.width():.0f}x{rect.height():.0f}",
+                "PhotoEditor", Qgis.Info
+            )
     
     def _add_text(self):
         """テキスト追加"""
@@ -306,10 +385,11 @@ class PhotoGraphicsView(QGraphicsView):
         text_item.setTextInteractionFlags(Qt.TextEditorInteraction)
         self.scene().addItem(text_item)
         
-        QgsMessageLog.logMessage(
-            f"テキスト追加: ({self.start_point.x():.0f},{self.start_point.y():.0f})",
-            "PhotoEditor", Qgis.Info
-        )
+        if DEBUG:
+            QgsMessageLog.logMessage(
+                f"テキスト追加: ({self.start_point.x():.0f},{self.start_point.y():.0f})",
+                "PhotoEditor", Qgis.Info
+            )
 
 
 class PhotoEditorWidget(QgsEditorWidgetWrapper):
@@ -317,6 +397,9 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
     写真編集カスタムウィジェット
     """
     
+    # 写真パスを取得するフィールド（優先順）
+    _PATH_FIELDS = ('photo_original_path', 'photo_path')
+    
     def __init__(self, vl, fieldIdx, editor, parent):
         super().__init__(vl, fieldIdx, editor, parent)
         self.widget = None
@@ -327,10 +410,25 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
         self.current_photo_path = None
         self._current_feature = None
         
+        # 写真パスのキャッシュ: (レイヤーID, 地物ID) -> パス
+        self._path_cache = {}
+        if vl is not None:
+            vl.attributeValueChanged.connect(self._on_attribute_value_changed)
+        
+        # 非同期読み込み（古いリクエストの結果は破棄する）
+        self._load_request_id = 0
+        self._pending_loader = None
+        
+        # フィット要求をまとめるタイマー（連続した地物切り替えでも1回だけ実行）
+        self._fit_timer = QTimer(self)
+        self._fit_timer.setSingleShot(True)
+        self._fit_timer.timeout.connect(self._fit_to_view)
+        
         # 描画設定
         self.current_tool = DrawingTool.SELECT
         self.current_color = QColor('#FF0000')
         self.line_width = 3
+        self._pen_cache = {}  # (rgba, 線幅) -> QPen
         
         # ツールボタン
         self.tool_buttons = {}
@@ -353,11 +451,16 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
         
         # QGraphicsView（画像表示エリア）
         self.graphics_scene = QGraphicsScene(widget)
+        # アイテム数は少なく描画中に頻繁に変化するため、BSPインデックスは使わない
+        self.graphics_scene.setItemIndexMethod(QGraphicsScene.NoIndex)
         self.graphics_view = PhotoGraphicsView(self.graphics_scene, widget)
         self.graphics_view.set_editor_widget(self)
         self.graphics_view.setMinimumSize(600, 400)
         self.graphics_view.setRenderHint(QPainter.Antialiasing, True)
         self.graphics_view.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        # プレビュー中の再描画を軽くする（標準アイテムのみなのでペイント状態の保存は不要）
+        self.graphics_view.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
+        self.graphics_view.setOptimizationFlag(QGraphicsView.DontSavePainterState, True)
         self.graphics_view.setStyleSheet("""
             QGraphicsView {
                 border: 1px solid #ccc;
@@ -394,10 +497,11 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
         layout.addLayout(bottom_layout)
         
         self.widget = widget
-        QgsMessageLog.logMessage(
-            f"createWidget完了: delete_btn={self.delete_btn}, save_btn={self.save_btn}, tool_buttons={list(self.tool_buttons.keys())}",
-            "PhotoEditor", Qgis.Info
-        )
+        if DEBUG:
+            QgsMessageLog.logMessage(
+                f"createWidget完了: delete_btn={self.delete_btn}, save_btn={self.save_btn}, tool_buttons={list(self.tool_buttons.keys())}",
+                "PhotoEditor", Qgis.Info
+            )
         return widget
     
     def _button_style(self, color):
@@ -450,6 +554,7 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
             btn.setText(icon)
             btn.setToolTip(tooltip)
             btn.setCheckable(True)
+            btn.setProperty("tool_id", tool_id)
             btn.setMinimumSize(32, 32)
             btn.setStyleSheet("""
                 QToolButton {
@@ -469,7 +574,8 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
             self.button_group.addButton(btn)
             self.tool_buttons[tool_id] = btn
             layout.addWidget(btn)
-            QgsMessageLog.logMessage(f"ツールボタン作成: {tool_id}", "PhotoEditor", Qgis.Info)
+            if DEBUG:
+                QgsMessageLog.logMessage(f"ツールボタン作成: {tool_id}", "PhotoEditor", Qgis.Info)
         
         # ボタングループのシグナル接続
         self.button_group.buttonClicked.connect(self._on_tool_button_clicked)
@@ -515,27 +621,32 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
     
     def _on_delete_clicked(self):
         """削除ボタンクリック"""
-        QgsMessageLog.logMessage("🗑 削除ボタンクリック", "PhotoEditor", Qgis.Info)
+        if DEBUG:
+            QgsMessageLog.logMessage("🗑 削除ボタンクリック", "PhotoEditor", Qgis.Info)
         self._delete_selected()
     
     def _on_clear_clicked(self):
         """全削除ボタンクリック"""
-        QgsMessageLog.logMessage("🧹 全削除ボタンクリック", "PhotoEditor", Qgis.Info)
+        if DEBUG:
+            QgsMessageLog.logMessage("🧹 全削除ボタンクリック", "PhotoEditor", Qgis.Info)
         self._clear_drawings()
     
     def _on_save_clicked(self):
         """保存ボタンクリック"""
-        QgsMessageLog.logMessage("💾 保存ボタンクリック", "PhotoEditor", Qgis.Info)
+        if DEBUG:
+            QgsMessageLog.logMessage("💾 保存ボタンクリック", "PhotoEditor", Qgis.Info)
         self._save_image()
     
     def _on_color_clicked(self):
         """色ボタンクリック"""
-        QgsMessageLog.logMessage("🎨 色ボタンクリック", "PhotoEditor", Qgis.Info)
+        if DEBUG:
+            QgsMessageLog.logMessage("🎨 色ボタンクリック", "PhotoEditor", Qgis.Info)
         self._choose_color()
     
     def _on_fit_clicked(self):
         """フィットボタンクリック"""
-        QgsMessageLog.logMessage("🔍 フィットボタンクリック", "PhotoEditor", Qgis.Info)
+        if DEBUG:
+            QgsMessageLog.logMessage("🔍 フィットボタンクリック", "PhotoEditor", Qgis.Info)
         self._fit_to_view()
     
     def _update_color_button(self):
@@ -553,15 +664,14 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
     
     def _on_tool_button_clicked(self, button):
         """ツールボタンがクリックされた時"""
-        QgsMessageLog.logMessage(
-            f"🔧 ツールボタンクリック: {button.text()} / {button.toolTip()}",
-            "PhotoEditor", Qgis.Info
-        )
-        # ボタンからツールIDを逆引き
-        for tool_id, btn in self.tool_buttons.items():
-            if btn == button:
-                self._set_tool(tool_id)
-                break
+        if DEBUG:
+            QgsMessageLog.logMessage(
+                f"🔧 ツールボタンクリック: {button.text()} / {button.toolTip()}",
+                "PhotoEditor", Qgis.Info
+            )
+        tool_id = button.property("tool_id")
+        if tool_id:
+            self._set_tool(tool_id)
     
     def _set_tool(self, tool):
         """ツール変更"""
@@ -573,47 +683,65 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
         else:
             self.graphics_view.setDragMode(QGraphicsView.NoDrag)
         
-        QgsMessageLog.logMessage(
-            f"ツール変更: {tool}",
-            "PhotoEditor", Qgis.Info
-        )
+        if DEBUG:
+            QgsMessageLog.logMessage(
+                f"ツール変更: {tool}",
+                "PhotoEditor", Qgis.Info
+            )
     
     def _choose_color(self):
         """色選択ダイアログ"""
         color = QColorDialog.getColor(self.current_color, self.widget, "描画色を選択")
         if color.isValid():
             self.current_color = color
+            self._pen_cache.clear()
             self._update_color_button()
-            QgsMessageLog.logMessage(
-                f"色変更: {color.name()}",
-                "PhotoEditor", Qgis.Info
-            )
+            if DEBUG:
+                QgsMessageLog.logMessage(
+                    f"色変更: {color.name()}",
+                    "PhotoEditor", Qgis.Info
+                )
     
     def _set_line_width(self, width):
         """線幅変更"""
         self.line_width = width
+        self._pen_cache.clear()
+    
+    def get_pen(self):
+        """現在の色・線幅の描画ペンを取得（キャッシュ）"""
+        key = (self.current_color.rgba(), self.line_width)
+        pen = self._pen_cache.get(key)
+        if pen is None:
+            pen = QPen(self.current_color)
+            pen.setWidth(self.line_width)
+            pen.setCapStyle(Qt.RoundCap)
+            pen.setJoinStyle(Qt.RoundJoin)
+            self._pen_cache[key] = pen
+        return pen
     
     def _delete_selected(self):
         """選択アイテム削除"""
         for item in self.graphics_scene.selectedItems():
             if item != self.pixmap_item:  # 背景画像は削除しない
                 self.graphics_scene.removeItem(item)
-        QgsMessageLog.logMessage("選択アイテム削除", "PhotoEditor", Qgis.Info)
+        if DEBUG:
+            QgsMessageLog.logMessage("選択アイテム削除", "PhotoEditor", Qgis.Info)
     
     def _clear_drawings(self):
         """全描画削除（背景画像以外）"""
-        items_to_remove = []
-        for item in self.graphics_scene.items():
-            if item != self.pixmap_item:
-                items_to_remove.append(item)
-        
-        for item in items_to_remove:
-            self.graphics_scene.removeItem(item)
+        scene = self.graphics_scene
+        removed = 0
+        # items() はリストのスナップショットを返すため、走査中に削除してよい
+        for item in scene.items():
+            if item is not self.pixmap_item:
+                scene.removeItem(item)
+                removed += 1
         
-        QgsMessageLog.logMessage(
-            f"全描画削除: {len(items_to_remove)}個のアイテム",
-            "PhotoEditor", Qgis.Info
-        )
+        if DEBUG:
+            QgsMessageLog.logMessage(
+                f"全描画削除: {removed}個のアイテム",
+                "PhotoEditor", Qgis.Info
+            )
     
     def _save_image(self):
         """編集済み画像を保存"""
@@ -623,94 +751,106 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
             return
         
         try:
-            # シーン内のアイテム数を確認
-            all_items = self.graphics_scene.items()
-            QgsMessageLog.logMessage(
-                f"シーン内アイテム数: {len(all_items)}",
-                "PhotoEditor", Qgis.Info
-            )
-            for i, item in enumerate(all_items):
+            if DEBUG:
+                # シーン内のアイテム数を確認
+                all_items = self.graphics_scene.items()
                 QgsMessageLog.logMessage(
-                    f"  アイテム{i}: {type(item).__name__}, zValue={item.zValue()}, visible={item.isVisible()}",
+                    f"シーン内アイテム数: {len(all_items)}",
                     "PhotoEditor", Qgis.Info
                 )
+                for i, item in enumerate(all_items):
+                    QgsMessageLog.logMessage(
+                        f"  アイテム{i}: {type(item).__name__}, zValue={item.zValue()}, visible={item.isVisible()}",
+                        "PhotoEditor", Qgis.Info
+                    )
             
             # シーンの範囲を取得
             scene_rect = self.graphics_scene.sceneRect()
-            QgsMessageLog.logMessage(
-                f"シーン範囲: {scene_rect.width()}x{scene_rect.height()}",
-                "PhotoEditor", Qgis.Info
-            )
-            
-            # 方法: QGraphicsViewからグラブ
-            # まずビューをシーン全体にフィット
-            self.graphics_view.fitInView(scene_rect, Qt.KeepAspectRatio)
+            if DEBUG:
+                QgsMessageLog.logMessage(
+                    f"シーン範囲: {scene_rect.width()}x{scene_rect.height()}",
+                    "PhotoEditor", Qgis.Info
+                )
             
-            # ビューポートのサイズでQPixmapを作成
-            # シーンのサイズで画像を作成
-            width = int(scene_rect.width())
-            height = int(scene_rect.height())
+            # 表示用の画像は縮小して読み込んでいるため、元画像をフル解像度で読み直す
+            original_image = QImage(self.current_photo_path)
+            if original_image.isNull():
+                # 読み直せない場合はシーンのサイズで画像を作成
+                width = int(scene_rect.width())
+                height = int(scene_rect.height())
+            else:
+                width = original_image.width()
+                height = original_image.height()
             
-            # QPixmapを作成
-            pixmap = QPixmap(width, height)
-            pixmap.fill(QColor(255, 255, 255))
+            # 保存用のQImageを作成（QPixmapを経由せず直接描画）
+            # QPainterの合成が最も速いARGB32_Premultipliedを使う（JPEG保存時にαは捨てられる）
+            image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+            image.fill(WHITE)
             
             # QPainterでシーンを描画
-            painter = QPainter(pixmap)
+            painter = QPainter(image)
             painter.setRenderHint(QPainter.Antialiasing, True)
             painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
             painter.setRenderHint(QPainter.TextAntialiasing, True)
             
             # 背景を白で塗りつぶし
-            painter.fillRect(0, 0, width, height, QColor(255, 255, 255))
+            painter.fillRect(0, 0, width, height, WHITE)
+            
+            # 背景は元画像を直接描画し、注釈だけをシーンから拡大レンダリング
+            hide_background = not original_image.isNull() and self.pixmap_item is not None
+            if hide_background:
+                painter.drawImage(QRectF(0, 0, width, height), original_image)
+                self.pixmap_item.setVisible(False)
             
             # シーンをレンダリング
-            self.graphics_scene.render(
-                painter,
-                QRectF(0, 0, width, height),  # ターゲット
-                scene_rect                     # ソース
-            )
-            painter.end()
+            try:
+                self.graphics_scene.render(
+                    painter,
+                    QRectF(0, 0, width, height),  # ターゲット
+                    scene_rect                     # ソース
+                )
+            finally:
+                if hide_background:
+                    self.pixmap_item.setVisible(True)
+                painter.end()
             
-            QgsMessageLog.logMessage(
-                f"レンダリング完了: pixmap.isNull()={pixmap.isNull()}, size={pixmap.width()}x{pixmap.height()}",
-                "PhotoEditor", Qgis.Info
-            )
+            if DEBUG:
+                QgsMessageLog.logMessage(
+                    f"レンダリング完了: image.isNull()={image.isNull()}, size={image.width()}x{image.height()}",
+                    "PhotoEditor", Qgis.Info
+                )
             
             # 保存先パス生成
-            original_path = Path(self.current_photo_path)
-            original_path_str = str(original_path)
+            original_path = self.current_photo_path
             
             # /original/ を /edited/ に置換
-            if '/original/' in original_path_str:
-                edited_path_str = original_path_str.replace('/original/', '/edited/')
-                edited_path = Path(edited_path_str)
+            if '/original/' in original_path:
+                edited_path = original_path.replace('/original/', '/edited/')
             else:
-                edited_dir = original_path.parent.parent / "edited"
-                edited_path = edited_dir / original_path.name
+                p = Path(original_path)
+                edited_path = str(p.parent.parent / "edited" / p.name)
             
             # ディレクトリを作成
-            edited_path.parent.mkdir(parents=True, exist_ok=True)
+            os.makedirs(os.path.dirname(edited_path), exist_ok=True)
             
-            QgsMessageLog.logMessage(
-                f"保存先: {edited_path}",
-                "PhotoEditor", Qgis.Info
-            )
-            
-            # QPixmapをQImageに変換して保存
-            image = pixmap.toImage()
-            
-            # JPEG保存
-            if image.save(str(edited_path), "JPEG", 90):
-                self.status_label.setText(f"✓ 保存完了: {edited_path.name}")
-                self.status_label.setStyleSheet("color: #34C759;")
+            if DEBUG:
                 QgsMessageLog.logMessage(
-                    f"画像保存成功: {edited_path}",
+                    f"保存先: {edited_path}",
                     "PhotoEditor", Qgis.Info
                 )
+            
+            # JPEG保存
+            if image.save(edited_path, "JPEG", 90):
+                self.status_label.setText(f"✓ 保存完了: {os.path.basename(edited_path)}")
+                self.status_label.setStyleSheet("color: #34C759;")
+                if DEBUG:
+                    QgsMessageLog.logMessage(
+                        f"画像保存成功: {edited_path}",
+                        "PhotoEditor", Qgis.Info
+                    )
                 
                 # photo_edited_path フィールド更新
-                self._update_edited_path_field(str(edited_path))
+                self._update_edited_path_field(edited_path)
             else:
                 raise Exception("画像保存に失敗")
             
@@ -749,20 +889,20 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
             # フィールドインデックス取得
             field_idx = feature.fields().indexOf('photo_edited_path')
             
-            # レイヤーを編集モードにして更新
-            was_editing = layer.isEditable()
-            if not was_editing:
-                layer.startEditing()
-            
-            layer.changeAttributeValue(feature.id(), field_idx, edited_path)
-            
-            if not was_editing:
-                layer.commitChanges()
+            if layer.isEditable():
+                # 編集セッション中は変更をバッファに積むだけにし、
+                # コミットはユーザーの保存操作でまとめて行う
+                layer.changeAttributeValue(feature.id(), field_idx, edited_path)
+            else:
+                # 編集モードでなければこの1件だけをコミット（失敗時はロールバック）
+                with edit(layer):
+                    layer.changeAttributeValue(feature.id(), field_idx, edited_path)
             
-            QgsMessageLog.logMessage(
-                f"photo_edited_path 更新: {edited_path}",
-                "PhotoEditor", Qgis.Info
-            )
+            if DEBUG:
+                QgsMessageLog.logMessage(
+                    f"photo_edited_path 更新: {edited_path}",
+                    "PhotoEditor", Qgis.Info
+                )
             
         except Exception as e:
             QgsMessageLog.logMessage(
@@ -770,6 +910,12 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
                 "PhotoEditor", Qgis.Warning
             )
     
+    def _on_attribute_value_changed(self, fid, idx, value):
+        """属性変更時に該当地物のパスキャッシュを破棄"""
+        layer = self.layer()
+        if layer:
+            self._path_cache.pop((layer.id(), fid), None)
+    
     def initWidget(self, editor):
         """初期化"""
         self.status_label.setText("✓ 初期化完了")
@@ -778,7 +924,8 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
         """地物がセットされた時"""
         super().setFeature(feature)
         self._current_feature = feature
-        QgsMessageLog.logMessage("setFeature() 呼び出し", "PhotoEditor", Qgis.Info)
+        if DEBUG:
+            QgsMessageLog.logMessage("setFeature() 呼び出し", "PhotoEditor", Qgis.Info)
         self.load_photo()
     
     def value(self):
@@ -790,14 +937,17 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
     def _fit_to_view(self):
         """画像をビューにフィット"""
         if self.pixmap_item and self.graphics_scene:
-            self.graphics_view.fitInView(
-                self.graphics_scene.sceneRect(),
-                Qt.KeepAspectRatio
-            )
+            self.graphics_view.fit_scene()
     
     def load_photo(self):
         """写真読み込み"""
-        QgsMessageLog.logMessage("=== load_photo() 開始 ===", "PhotoEditor", Qgis.Info)
+        if DEBUG:
+            QgsMessageLog.logMessage("=== load_photo() 開始 ===", "PhotoEditor", Qgis.Info)
+        # 実行中の読み込みがあれば、その結果は破棄させる
+        # （新しい画像が表示されるまでは保存先の元画像も持たない）
+        self._load_request_id += 1
+        self._pending_loader = None
+        self.current_photo_path = None
         try:
             # 地物取得
             feature = None
@@ -814,7 +964,13 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
                 self.status_label.setStyleSheet("color: #FF9500;")
                 return
             
-            photo_path = self._get_photo_path(feature)
+            layer = self.layer()
+            cache_key = (layer.id(), feature.id()) if layer else None
+            photo_path = self._path_cache.get(cache_key) if cache_key else None
+            if photo_path is None:
+                photo_path = self._get_photo_path(feature)
+                if photo_path and cache_key:
+                    self._path_cache[cache_key] = photo_path
             
             if not photo_path:
                 self.status_label.setText("⚠ 写真パスが取得できません")
@@ -826,64 +982,89 @@ class PhotoEditorWidget(QgsEditorWidgetWrapper):
                 self.status_label.setStyleSheet("color: #FF3B30;")
                 return
             
-            pixmap = self._load_image_as_pixmap(photo_path)
+            # 同じファイルはQPixmapCacheから再利用
+            cache_key = pixmap_cache_key(photo_path, MAX_DISPLAY_SIZE)
+            pixmap = find_pixmap(cache_key)
+            if pixmap is not None:
+                self._show_pixmap(pixmap, photo_path)
+                return
+            
+            # デコードはスレッドプールで行い、フォームの表示をブロックしない
+            loader = PhotoLoader(photo_path, cache_key, self._load_request_id, MAX_DISPLAY_SIZE)
+            loader.signals.loaded.connect(self._on_photo_loaded)
+            self._pending_loader = loader
+            self.status_label.setText("読み込み中...")
+            self.status_label.setStyleSheet("color: #666;")
+            QThreadPool.globalInstance().start(loader)
             
-            if pixmap is None or pixmap.isNull():
+        except Exception as e:
+            self.status_label.setText(f"❌ エラー: {str(e)}")
+            self.status_label.setStyleSheet("color: #FF3B30;")
+            QgsMessageLog.logMessage(f"画像読み込みエラー: {str(e)}", "PhotoEditor", Qgis.Critical)
+    
+    def _on_photo_loaded(self, qimage, photo_path, cache_key, request_id):
+        """画像の読み込み完了（GUIスレッド）"""
+        if request_id != self._load_request_id:
+            # 別の地物に切り替わった後に届いた結果は破棄
+            return
+        self._pending_loader = None
+        
+        try:
+            pixmap = cache_pixmap(qimage, cache_key)
+            if pixmap is None:
                 self.status_label.setText("❌ 画像の読み込みに失敗")
                 self.status_label.setStyleSheet("color: #FF3B30;")
                 return
             
-            # シーンをクリアして新しい画像を追加
+            self._show_pixmap(pixmap, photo_path)
+            
+        except Exception as e:
+            self.status_label.setText(f"❌ エラー: {str(e)}")
+            self.status_label.setStyleSheet("color: #FF3B30;")
+            QgsMessageLog.logMessage(f"画像読み込みエラー: {str(e)}", "PhotoEditor", Qgis.Critical)
+    
+    def _show_pixmap(self, pixmap, photo_path):
+        """読み込んだ画像をシーンに表示"""
+        if self.pixmap_item is not None and self.pixmap_item.scene() is self.graphics_scene:
+            # 描画だけを削除し、背景アイテムは画像を差し替えて再利用
+            self._clear_drawings()
+            self.pixmap_item.setPixmap(pixmap)
+        else:
+            # 初回はシーンをクリアして新しい画像を追加
             self.graphics_scene.clear()
             self.pixmap_item = QGraphicsPixmapItem(pixmap)
             self.pixmap_item.setZValue(-1)  # 背景として最背面に
             self.graphics_scene.addItem(self.pixmap_item)
-            
-            # シーン範囲設定
-            rect = pixmap.rect()
-            self.graphics_scene.setSceneRect(QRectF(rect.x(), rect.y(), rect.width(), rect.height()))
-            
-            # フィット
-            QTimer.singleShot(100, lambda: self._fit_to_view())
-            
-            self.current_photo_path = photo_path
-            self.status_label.setText(f"✓ {os.path.basename(photo_path)}")
-            self.status_label.setStyleSheet("color: #34C759;")
-            
+        
+        # シーン範囲設定
+        rect = pixmap.rect()
+        self.graphics_scene.setSceneRect(QRectF(rect.x(), rect.y(), rect.width(), rect.height()))
+        
+        # フィット
+        self._fit_timer.start(FIT_DELAY_MS)
+        
+        self.current_photo_path = photo_path
+        self.status_label.setText(f"✓ {os.path.basename(photo_path)}")
+        self.status_label.setStyleSheet("color: #34C759;")
+        
+        if DEBUG:
             QgsMessageLog.logMessage(
                 f"画像読み込み成功: {pixmap.width()}x{pixmap.height()}",
                 "PhotoEditor", Qgis.Info
             )
-            
-        except Exception as e:
-            self.status_label.setText(f"❌ エラー: {str(e)}")
-            self.status_label.setStyleSheet("color: #FF3B30;")
-            QgsMessageLog.logMessage(f"画像読み込みエラー: {str(e)}", "PhotoEditor", Qgis.Critical)
-    
-    def _load_image_as_pixmap(self, photo_path):
-        """画像をQPixmapとして読み込む"""
-        try:
-            qimage = QImage(photo_path)
-            if not qimage.isNull():
-                qimage = qimage.convertToFormat(QImage.Format_RGB32)
-                pixmap = QPixmap.fromImage(qimage)
-                QgsMessageLog.logMessage(f"画像読み込み成功: depth={pixmap.depth()}", "PhotoEditor", Qgis.Info)
-                return pixmap
-        except Exception as e:
-            QgsMessageLog.logMessage(f"画像読み込み失敗: {str(e)}", "PhotoEditor", Qgis.Warning)
-        return None
     
     def _get_photo_path(self, feature):
         """地物から写真パスを取得"""
-        field_names = feature.fields().names()
-        path_fields = ['photo_original_path', 'photo_path']
+        fields = feature.fields()
         
-        for field_name in path_fields:
-            if field_name in field_names:
-                path = feature[field_name]
+        for field_name in self._PATH_FIELDS:
+            idx = fields.indexFromName(field_name)
+            if idx >= 0:
+                path = feature.attribute(idx)
                 if path and str(path).strip():
                     photo_path = str(path).strip()
-                    QgsMessageLog.logMessage(f"写真パス取得 ({field_name}): {photo_path}", "PhotoEditor", Qgis.Info)
+                    if DEBUG:
+                        QgsMessageLog.logMessage(f"写真パス取得 ({field_name}): {photo_path}", "PhotoEditor", Qgis.Info)
                     return photo_path
         
         return None
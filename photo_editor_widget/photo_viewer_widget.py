@@ -9,18 +9,46 @@ import os
 from qgis.gui import QgsEditorWidgetWrapper
 from qgis.PyQt.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QGraphicsView, 
-    QGraphicsScene, QGraphicsPixmapItem
+    QGraphicsScene, QGraphicsPixmapItem, QGraphicsItem
 )
-from qgis.PyQt.QtGui import QPixmap, QImage, QPainter
-from qgis.PyQt.QtCore import Qt, QRectF, QTimer
+from qgis.PyQt.QtGui import QPixmap, QPainter
+from qgis.PyQt.QtCore import Qt, QRectF, QSize, QThreadPool
 from qgis.core import QgsMessageLog, Qgis
 
+from .utils.image_loader import PhotoLoader, pixmap_cache_key, find_pixmap, cache_pixmap
+from .utils.view_fit import fit_view_to_scene
+
+
+# 表示用に読み込む画像の最大サイズ（ビュー最大 600x400 の2倍）
+MAX_DISPLAY_SIZE = QSize(1200, 800)
+
+
+class PhotoViewerGraphicsView(QGraphicsView):
+    """
+    表示専用GraphicsView - サイズ確定・変更時に画像をフィットさせる
+    """
+    
+    def fit_scene(self):
+        """シーン全体をビューにフィット"""
+        fit_view_to_scene(self)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.fit_scene()
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.fit_scene()
+
 
 class PhotoViewerWidget(QgsEditorWidgetWrapper):
     """
     写真表示専用ウィジェット（編集不可）
     """
     
+    # 編集済み画像のパスを取得するフィールド（優先順）
+    _EDITED_FIELDS = ('photo_edited_path', 'photo_edited')
+    
     def __init__(self, vl, fieldIdx, editor, parent):
         super().__init__(vl, fieldIdx, editor, parent)
         self.widget = None
@@ -29,6 +57,9 @@ class PhotoViewerWidget(QgsEditorWidgetWrapper):
         self.pixmap_item = None
         self.status_label = None
         self._current_feature = None
+        self._load_request_id = 0  # 最新の読み込み要求ID（古い結果の破棄用）
+        self._pending_loader = None  # 実行中のPhotoLoader（シグナル保持用）
+        self._last_loaded = None  # 表示中の画像のキャッシュキー（パス・更新時刻・サイズ）
     
     def createWidget(self, parent):
         """ウィジェット作成"""
@@ -44,7 +75,7 @@ class PhotoViewerWidget(QgsEditorWidgetWrapper):
         
         # QGraphicsView（画像表示エリア）- 読み取り専用
         self.graphics_scene = QGraphicsScene(widget)
-        self.graphics_view = QGraphicsView(self.graphics_scene, widget)
+        self.graphics_view = PhotoViewerGraphicsView(self.graphics_scene, widget)
         self.graphics_view.setMinimumSize(300, 200)
         self.graphics_view.setMaximumSize(600, 400)
         self.graphics_view.setRenderHint(QPainter.Antialiasing, True)
@@ -61,6 +92,12 @@ class PhotoViewerWidget(QgsEditorWidgetWrapper):
         # インタラクションを無効化
         self.graphics_view.setInteractive(False)
         
+        # 画像アイテムは1つを使い回す（地物切り替え時は setPixmap のみ）
+        self.pixmap_item = QGraphicsPixmapItem()
+        # 縮小描画の結果をデバイス座標でキャッシュし、再描画を転送だけにする
+        self.pixmap_item.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+        self.graphics_scene.addItem(self.pixmap_item)
+        
         layout.addWidget(self.graphics_view)
         
         self.widget = widget
@@ -85,13 +122,18 @@ class PhotoViewerWidget(QgsEditorWidgetWrapper):
     def _fit_to_view(self):
         """画像をビューにフィット"""
         if self.pixmap_item and self.graphics_scene:
-            self.graphics_view.fitInView(
-                self.graphics_scene.sceneRect(),
-                Qt.KeepAspectRatio
-            )
+            self.graphics_view.fit_scene()
+    
+    def _clear_photo(self):
+        """表示中の画像を消去（アイテムは残して再利用する）"""
+        self.pixmap_item.setPixmap(QPixmap())
+        self._last_loaded = None
     
     def load_photo(self):
         """写真読み込み"""
+        # 実行中の読み込みがあれば、その結果は破棄させる
+        self._load_request_id += 1
+        self._pending_loader = None
         try:
             # 地物取得
             feature = None
@@ -106,56 +148,59 @@ class PhotoViewerWidget(QgsEditorWidgetWrapper):
             if not feature or not feature.isValid():
                 self.status_label.setText("編集済み画像: なし")
                 self.status_label.setStyleSheet("color: #999;")
-                self.graphics_scene.clear()
+                self._clear_photo()
                 return
             
             # photo_edited_pathを取得
-            field_names = feature.fields().names()
+            fields = feature.fields()
             photo_path = None
             
-            for field_name in ['photo_edited_path', 'photo_edited']:
-                if field_name in field_names:
-                    path = feature[field_name]
-                    if path and str(path).strip() and str(path).strip().upper() != 'NULL':
-                        photo_path = str(path).strip()
-                        break
+            for field_name in self._EDITED_FIELDS:
+                idx = fields.indexFromName(field_name)
+                if idx < 0:
+                    continue
+                path = feature.attribute(idx)
+                if not path:
+                    continue
+                path = str(path).strip()
+                if path and path.upper() != 'NULL':
+                    photo_path = path
+                    break
             
             if not photo_path:
                 self.status_label.setText("編集済み画像: 未保存")
                 self.status_label.setStyleSheet("color: #999;")
-                self.graphics_scene.clear()
+                self._clear_photo()
                 return
             
             if not os.path.exists(photo_path):
                 self.status_label.setText(f"❌ ファイルなし")
                 self.status_label.setStyleSheet("color: #FF3B30;")
-                self.graphics_scene.clear()
+                self._clear_photo()
                 return
             
-            # 画像読み込み
-            pixmap = self._load_image_as_pixmap(photo_path)
-            
-            if pixmap is None or pixmap.isNull():
-                self.status_label.setText("❌ 読み込み失敗")
-                self.status_label.setStyleSheet("color: #FF3B30;")
+            # 表示中と同じファイル（未更新）なら何もしない
+            cache_key = pixmap_cache_key(photo_path, MAX_DISPLAY_SIZE)
+            if cache_key == self._last_loaded:
                 return
             
-            # シーンをクリアして画像を追加
-            self.graphics_scene.clear()
-            self.pixmap_item = QGraphicsPixmapItem(pixmap)
-            self.graphics_scene.addItem(self.pixmap_item)
-            
-            # シーン範囲設定
-            rect = pixmap.rect()
-            self.graphics_scene.setSceneRect(QRectF(rect.x(), rect.y(), rect.width(), rect.height()))
-            
-            # フィット
-            QTimer.singleShot(100, lambda: self._fit_to_view())
+            # 同じファイルはQPixmapCacheから再利用
+            pixmap = find_pixmap(cache_key)
+            if pixmap is not None:
+                self._show_pixmap(pixmap, photo_path, cache_key)
+                return
             
-            self.status_label.setText(f"✓ {os.path.basename(photo_path)}")
-            self.status_label.setStyleSheet("color: #34C759;")
+            # デコードはスレッドプールで行い、フォームの表示をブロックしない
+            loader = PhotoLoader(photo_path, cache_key, self._load_request_id, MAX_DISPLAY_SIZE)
+            loader.signals.loaded.connect(self._on_photo_loaded)
+            self._pending_loader = loader
+            self._clear_photo()
+            self.status_label.setText("読み込み中...")
+            self.status_label.setStyleSheet("color: #666;")
+            QThreadPool.globalInstance().start(loader)
             
         except Exception as e:
+            self._last_loaded = None
             self.status_label.setText(f"❌ エラー")
             self.status_label.setStyleSheet("color: #FF3B30;")
             QgsMessageLog.logMessage(
@@ -163,16 +208,40 @@ class PhotoViewerWidget(QgsEditorWidgetWrapper):
                 "PhotoEditor", Qgis.Warning
             )
     
-    def _load_image_as_pixmap(self, photo_path):
-        """画像をQPixmapとして読み込む"""
+    def _on_photo_loaded(self, qimage, photo_path, cache_key, request_id):
+        """画像の読み込み完了（GUIスレッド）"""
+        if request_id != self._load_request_id:
+            # 別の地物に切り替わった後に届いた結果は破棄
+            return
+        self._pending_loader = None
+        
         try:
-            qimage = QImage(photo_path)
-            if not qimage.isNull():
-                qimage = qimage.convertToFormat(QImage.Format_RGB32)
-                return QPixmap.fromImage(qimage)
+            pixmap = cache_pixmap(qimage, cache_key)
+            if pixmap is None:
+                self.status_label.setText("❌ 読み込み失敗")
+                self.status_label.setStyleSheet("color: #FF3B30;")
+                return
+            
+            self._show_pixmap(pixmap, photo_path, cache_key)
+            
         except Exception as e:
+            self._last_loaded = None
+            self.status_label.setText("❌ エラー")
+            self.status_label.setStyleSheet("color: #FF3B30;")
             QgsMessageLog.logMessage(
-                f"画像読み込み失敗: {str(e)}",
+                f"PhotoViewer エラー: {str(e)}",
                 "PhotoEditor", Qgis.Warning
             )
-        return None
+    
+    def _show_pixmap(self, pixmap, photo_path, cache_key):
+        """読み込んだ画像を表示"""
+        # 既存アイテムの画像を差し替え、シーン範囲を設定
+        self.pixmap_item.setPixmap(pixmap)
+        self.graphics_scene.setSceneRect(QRectF(pixmap.rect()))
+        
+        # フィット（レイアウト未確定の場合は表示・リサイズ時にビュー側で再フィット）
+        self._fit_to_view()
+        
+        self._last_loaded = cache_key
+        self.status_label.setText(f"✓ {os.path.basename(photo_path)}")
+        self.status_label.setStyleSheet("color: #34C759;")
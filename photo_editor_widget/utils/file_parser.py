@@ -8,7 +8,15 @@
 
 import re
 from typing import Optional, Dict
-from qgis.core import QgsMessageLog, Qgis
+
+
+# ファイル名パターン（正規表現）
+_FILENAME_PATTERN = re.compile(
+    r'^(?P<build_code>[^-]+)-'           # ビルコード（ハイフンまで）
+    r'(?P<facility_name>[^_]+)_'         # 設備名（アンダースコアまで）
+    r'(?P<facility_number>[^.]+)'        # 設備番号（拡張子まで）
+    r'(?P<extension>\.[^.]+)$'           # 拡張子
+)
 
 
 class PhotoFileNameParser:
@@ -18,13 +26,8 @@ class PhotoFileNameParser:
     ファイル名形式: [ビルコード-設備名_設備番号].jpg
     """
     
-    # ファイル名パターン（正規表現）
-    FILENAME_PATTERN = re.compile(
-        r'^(?P<build_code>[^-]+)-'           # ビルコード（ハイフンまで）
-        r'(?P<facility_name>[^_]+)_'         # 設備名（アンダースコアまで）
-        r'(?P<facility_number>[^.]+)'        # 設備番号（拡張子まで）
-        r'(?P<extension>\.[^.]+)$'           # 拡張子
-    )
+    # ファイル名パターン（外部参照用にクラス属性としても公開）
+    FILENAME_PATTERN = _FILENAME_PATTERN
     
     @classmethod
     def parse(cls, filename: str) -> Optional[Dict[str, str]]:
@@ -42,18 +45,24 @@ class PhotoFileNameParser:
                 - extension: 拡張子
             None: 解析失敗時
         """
-        try:
-            match = cls.FILENAME_PATTERN.match(filename)
-            if match:
-                return match.groupdict()
+        # FILENAME_PATTERN と同じ規則を区切り文字の分割だけで判定する
+        # （ビルコードは最初の '-' まで、設備名はその後最初の '_' まで、
+        #   残りは '.' をちょうど1つ含む「設備番号.拡張子」）
+        build_code, dash, rest = filename.partition('-')
+        if not (dash and build_code):
+            return None
+        facility_name, underscore, tail = rest.partition('_')
+        if not (underscore and facility_name):
             return None
-        except Exception as e:
-            QgsMessageLog.logMessage(
-                f"ファイル名解析エラー: {e}",
-                "PhotoEditor",
-                Qgis.Critical
-            )
+        facility_number, dot, ext = tail.partition('.')
+        if not (dot and facility_number and ext) or '.' in ext:
             return None
+        return {
+            'build_code': build_code,
+            'facility_name': facility_name,
+            'facility_number': facility_number,
+            'extension': dot + ext,
+        }
     
     @classmethod
     def build(cls, build_code: str, facility_name: str, 
@@ -70,18 +79,7 @@ class PhotoFileNameParser:
         Returns:
             str: ファイル名
         """
-        try:
-            # ファイル名を構築
-            filename = f"{build_code}-{facility_name}_{facility_number}{extension}"
-            
-            return filename
-        except Exception as e:
-            QgsMessageLog.logMessage(
-                f"ファイル名生成エラー: {e}",
-                "PhotoEditor",
-                Qgis.Critical
-            )
-            return None
+        return f"{build_code}-{facility_name}_{facility_number}{extension}"
     
     @classmethod
     def build_unique_key(cls, build_code: str, facility_name: str, 
@@ -97,13 +95,4 @@ class PhotoFileNameParser:
         Returns:
             str: ユニーク設備KEY
         """
-        try:
-            unique_key = f"{build_code}{facility_name}_{facility_number}"
-            return unique_key
-        except Exception as e:
-            QgsMessageLog.logMessage(
-                f"ユニークKEY生成エラー: {e}",
-                "PhotoEditor",
-                Qgis.Critical
-            )
-            return None
+        return f"{build_code}{facility_name}_{facility_number}"
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+表示用画像ローダー
+
+エディタ・ビューア共通の画像デコード処理とスレッドプール用タスク
+
+読み込みは次の1本の経路に統一する:
+    QImageReader（setScaledSize で縮小デコード）
+    → Format_ARGB32_Premultiplied に変換（ワーカースレッド）
+    → QPixmap.fromImage（GUIスレッド）
+    → QPixmapCache.insert
+
+読み込み処理はピクセルデータの転送量で律速されるため、縮小デコードと
+キャッシュで扱うバイト数自体を減らす。中間バッファは QPainter のラスタ
+描画がそのまま扱える ARGB32_Premultiplied（1画素4バイトで整列）に揃え、
+描画・QPixmap化のたびに形式変換が走らないようにする。
+RGB888 は1画素3バイトで整列が崩れ変換も遅いため使わない。
+"""
+
+import os
+from qgis.PyQt.QtGui import QPixmap, QPixmapCache, QImage, QImageReader
+from qgis.PyQt.QtCore import Qt, QObject, QRunnable, pyqtSignal
+from qgis.core import QgsMessageLog, Qgis
+
+
+def read_display_image(photo_path, max_size):
+    """
+    表示用に画像をQImageとして読み込む（ワーカースレッドから呼び出し可）
+    
+    Args:
+        photo_path: 画像ファイルパス
+        max_size: 読み込む最大サイズ（QSize）。超える画像は縮小してデコード
+    
+    Returns:
+        QImage: 読み込んだ画像（失敗時は isNull() が True）
+    """
+    try:
+        reader = QImageReader(photo_path)
+        reader.setDecideFormatFromContent(True)
+        # ヘッダだけを確認し、読めないファイルはデコードせずに終了
+        if not reader.canRead():
+            return QImage()
+        size = reader.size()
+        if not size.isValid():
+            return QImage()
+        if size.width() > max_size.width() or size.height() > max_size.height():
+            # JPEGはデコード時に縮小できるため、フル解像度での展開を避ける
+            reader.setScaledSize(size.scaled(max_size, Qt.KeepAspectRatio))
+        qimage = reader.read()
+        if not qimage.isNull() and qimage.format() != QImage.Format_ARGB32_Premultiplied:
+            qimage = qimage.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+        return qimage
+    except Exception as e:
+        QgsMessageLog.logMessage(f"画像読み込み失敗: {str(e)}", "PhotoEditor", Qgis.Warning)
+        return QImage()
+
+
+def pixmap_cache_key(photo_path, max_size):
+    """
+    QPixmapCache のキー（ファイル更新・表示サイズが変われば別キー）
+    
+    デコード開始前に1度だけ求め、読み込み結果はこのキーで登録する。
+    デコード中にファイルが上書きされても、古い画素が新しいファイルの
+    キーで登録されることはない（次回はキーが変わり再読み込みされる）
+    """
+    st = os.stat(photo_path)
+    return (
+        f"{photo_path}:{st.st_mtime}:{st.st_size}"
+        f":{max_size.width()}x{max_size.height()}"
+    )
+
+
+def find_pixmap(cache_key):
+    """
+    QPixmapCache から読み込み済みの画像を探す（GUIスレッド専用）
+    
+    Returns:
+        QPixmap: キャッシュ済みの画像（未読み込みの場合は None）
+    """
+    pixmap = QPixmapCache.find(cache_key)
+    if pixmap is None or pixmap.isNull():
+        return None
+    return pixmap
+
+
+def cache_pixmap(qimage, cache_key):
+    """
+    デコード済みの QImage を QPixmap に変換してキャッシュする（GUIスレッド専用）
+    
+    Returns:
+        QPixmap: 変換した画像（失敗時は None）
+    """
+    if qimage.isNull():
+        return None
+    pixmap = QPixmap.fromImage(qimage)
+    if pixmap.isNull():
+        return None
+    QPixmapCache.insert(cache_key, pixmap)
+    return pixmap
+
+
+class PhotoLoaderSignals(QObject):
+    """PhotoLoader の完了通知用シグナル"""
+    loaded = pyqtSignal(QImage, str, str, int)  # 画像, パス, キャッシュキー, リクエストID
+
+
+class PhotoLoader(QRunnable):
+    """
+    画像デコードをスレッドプールで実行するタスク
+    
+    QPixmapはGUIスレッドでしか扱えないため、ワーカーではQImageまでを作成して
+    シグナルでGUIスレッドへ渡す
+    """
+    
+    def __init__(self, photo_path, cache_key, request_id, max_size):
+        super().__init__()
+        self.photo_path = photo_path
+        self.cache_key = cache_key
+        self.request_id = request_id
+        self.max_size = max_size
+        self.signals = PhotoLoaderSignals()
+    
+    def run(self):
+        """ワーカースレッドで画像を読み込む"""
+        qimage = read_display_image(self.photo_path, self.max_size)
+        self.signals.loaded.emit(qimage, self.photo_path, self.cache_key, self.request_id)
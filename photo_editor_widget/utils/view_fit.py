@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+ビューのフィット処理
+
+エディタ・ビューア共通のシーン全体表示
+"""
+
+from qgis.PyQt.QtGui import QTransform
+
+
+# フィット時にビューの各辺に残す余白（px、fitInView と同じ。スクロールバーの出入りを防ぐ）
+FIT_MARGIN = 2
+
+
+def fit_view_to_scene(view):
+    """
+    シーン全体をビューにフィット
+    
+    fitInView は変換のリセットと再計算を毎回行うため、縦横比を保った倍率を
+    直接求め、変化がある時だけ変換を設定する
+    
+    Args:
+        view: QGraphicsView
+    
+    Returns:
+        bool: ビューの変換を変更した場合 True
+    """
+    scene_rect = view.sceneRect()
+    view_rect = view.viewport().rect().adjusted(FIT_MARGIN, FIT_MARGIN, -FIT_MARGIN, -FIT_MARGIN)
+    if scene_rect.isEmpty() or view_rect.isEmpty():
+        return False
+    scale = min(
+        view_rect.width() / scene_rect.width(),
+        view_rect.height() / scene_rect.height()
+    )
+    fit = QTransform.fromScale(scale, scale)
+    changed = view.transform() != fit
+    if changed:
+        view.setTransform(fit)
+    view.centerOn(scene_rect.center())
+    return changed